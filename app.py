@@ -1,25 +1,60 @@
 import os
 import logging
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
 from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-import pandas as pd
-import plotly.graph_objs as go
-import plotly.utils
-import json
-from flight_data import FlightDataGenerator
+from flask_compress import Compress
+import numpy as np
+import orjson
+import plotly.io as pio
+from flight_data import FlightDataGenerator, route_seed
 from openai_insights import FlightInsightsGenerator
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.INFO)
 
 # Create Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
+# Compress responses; the dashboard embeds large, highly repetitive chart JSON
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'application/javascript', 'application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
+
 # Initialize data generators
 flight_data_generator = FlightDataGenerator()
 insights_generator = FlightInsightsGenerator()
 
+# Shared worker pool for overlapping OpenAI calls with chart building.
+# INSIGHTS_TIMEOUT is the total time a request waits for its insights, including
+# time queued behind other requests when all workers are busy. A timed-out call
+# that already started keeps its worker until the OpenAI request returns.
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
+INSIGHTS_TIMEOUT = 15
+
+# Flight data behind rendered dashboards, keyed by the data_key embedded in
+# the page so insight refreshes don't have to post the data back. The cache is
+# per process: with several gunicorn workers a refresh can land on a worker
+# that never rendered the page and get a 410, so run a single worker (with
+# threads) or move this to a shared store before scaling out.
+FLIGHT_DATA_CACHE = OrderedDict()
+FLIGHT_DATA_CACHE_SIZE = 256
+_flight_data_cache_lock = threading.Lock()
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_INDEX = {day: i for i, day in enumerate(DAYS_OF_WEEK)}
+
+# Shared chart layout; charts are built as plain dicts, so the named template
+# is resolved to its full JSON once up front
+LAYOUT_BASE = {
+    'template': pio.templates['plotly_dark'].to_plotly_json(),
+    'height': 400
+}
+
 @app.route('/')
 def index():
     """Main page with search form"""
@@ -50,26 +85,36 @@ def dashboard():
                 return redirect(url_for('index'))
             
             # Generate flight data
-            app.logger.info(f"Generating flight data for {from_city} to {to_city}")
-            flight_data = flight_data_generator.generate_flight_data(
-                from_city, to_city, start_date_obj, end_date_obj
-            )
+            app.logger.info("Generating flight data for %s to %s", from_city, to_city)
+            flight_data = get_flight_data(from_city, to_city, start_date_obj, end_date_obj)
             
             if not flight_data:
                 flash('No flight data available for the selected criteria', 'error')
                 return redirect(url_for('index'))
             
-            # Generate AI insights
+            data_key = f"{route_seed(from_city, to_city, start_date_obj, end_date_obj):016x}"
+            cache_flight_data(data_key, flight_data)
+            
+            # Generate AI insights in the background while the charts are built
             app.logger.info("Generating AI insights")
-            insights = insights_generator.generate_insights(flight_data)
+            future_insights = EXECUTOR.submit(insights_generator.generate_insights, flight_data)
             
             # Create visualizations
-            charts = create_charts(flight_data)
+            charts = get_charts(from_city, to_city, start_date_obj, end_date_obj)
+            
+            try:
+                insights = future_insights.result(timeout=INSIGHTS_TIMEOUT)
+            except TimeoutError:
+                # Drop the call if it is still queued so it doesn't occupy a worker
+                future_insights.cancel()
+                app.logger.warning("AI insights timed out, using fallback insights")
+                insights = insights_generator.generate_fallback_insights(flight_data)
             
             return render_template('dashboard.html',
                                  flight_data=flight_data,
                                  insights=insights,
                                  charts=charts,
+                                 data_key=data_key,
                                  search_params={
                                      'from_city': from_city,
                                      'to_city': to_city,
@@ -78,105 +123,176 @@ def dashboard():
                                  })
             
         except ValueError as e:
-            app.logger.error(f"Date parsing error: {e}")
+            app.logger.error("Date parsing error: %s", e)
             flash('Invalid date format', 'error')
             return redirect(url_for('index'))
         except Exception as e:
-            app.logger.error(f"Dashboard error: {e}")
+            app.logger.error("Dashboard error: %s", e)
             flash('An error occurred while processing your request', 'error')
             return redirect(url_for('index'))
     
     return redirect(url_for('index'))
 
+def cache_flight_data(data_key, flight_data):
+    """Remember the flight data behind a rendered dashboard"""
+    with _flight_data_cache_lock:
+        FLIGHT_DATA_CACHE[data_key] = flight_data
+        FLIGHT_DATA_CACHE.move_to_end(data_key)
+        if len(FLIGHT_DATA_CACHE) > FLIGHT_DATA_CACHE_SIZE:
+            FLIGHT_DATA_CACHE.popitem(last=False)
+
+def get_cached_flight_data(data_key):
+    """Look up the flight data for a data_key, or None if it has been evicted"""
+    with _flight_data_cache_lock:
+        flight_data = FLIGHT_DATA_CACHE.get(data_key)
+        if flight_data is not None:
+            FLIGHT_DATA_CACHE.move_to_end(data_key)
+        return flight_data
+
+@lru_cache(maxsize=256)
+def get_flight_data(from_city, to_city, start_date, end_date):
+    """Generate flight data, cached per route and date range"""
+    seed = route_seed(from_city, to_city, start_date, end_date)
+    return flight_data_generator.generate_flight_data(
+        from_city, to_city, start_date, end_date, seed=seed
+    )
+
+@lru_cache(maxsize=256)
+def get_charts(from_city, to_city, start_date, end_date):
+    """Create chart JSON, cached per route and date range"""
+    return create_charts(get_flight_data(from_city, to_city, start_date, end_date))
+
 def create_charts(flight_data):
     """Create Plotly charts from flight data"""
-    df = pd.DataFrame(flight_data)
+    prices = flight_data.price
     
-    # Price trend chart
-    price_trend = go.Scatter(
-        x=df['date'],
-        y=df['price'],
-        mode='lines+markers',
-        name='Price Trend',
-        line=dict(color='#007bff', width=3),
-        marker=dict(size=8)
-    )
+    # Aggregate prices to one mean/min/max point per date
+    dates, date_idx = np.unique(flight_data.date, return_inverse=True)
+    counts = np.bincount(date_idx)
+    mean_prices = np.bincount(date_idx, weights=prices) / counts
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    prices_by_date = prices[np.argsort(date_idx, kind='stable')]
+    min_prices = np.minimum.reduceat(prices_by_date, starts)
+    max_prices = np.maximum.reduceat(prices_by_date, starts)
     
-    price_chart = go.Figure(data=[price_trend])
-    price_chart.update_layout(
-        title='Flight Price Trend Over Time',
-        xaxis_title='Date',
-        yaxis_title='Price ($)',
-        template='plotly_dark',
-        height=400
-    )
+    # orjson serializes numeric arrays natively but not string arrays
+    dates = dates.tolist()
     
-    # Popular routes chart (by frequency)
-    route_counts = df['route'].value_counts().head(10)
+    # Price trend chart: average price line over a min/max band
+    price_chart = {
+        'data': [
+            {
+                'type': 'scatter',
+                'x': dates,
+                'y': min_prices,
+                'mode': 'lines',
+                'name': 'Min Price',
+                'line': {'width': 0},
+                'showlegend': False
+            },
+            {
+                'type': 'scatter',
+                'x': dates,
+                'y': max_prices,
+                'mode': 'lines',
+                'name': 'Price Range',
+                'line': {'width': 0},
+                'fill': 'tonexty',
+                'fillcolor': 'rgba(0, 123, 255, 0.2)'
+            },
+            {
+                'type': 'scatter',
+                'x': dates,
+                'y': mean_prices,
+                'mode': 'lines+markers',
+                'name': 'Average Price',
+                'line': {'color': '#007bff', 'width': 3},
+                'marker': {'size': 8}
+            }
+        ],
+        'layout': {
+            **LAYOUT_BASE,
+            'title': {'text': 'Flight Price Trend Over Time'},
+            'xaxis': {'title': {'text': 'Date'}},
+            'yaxis': {'title': {'text': 'Price ($)'}}
+        }
+    }
     
-    routes_chart = go.Figure(data=[
-        go.Bar(
-            x=route_counts.index,
-            y=route_counts.values,
-            marker_color='#28a745'
-        )
-    ])
+    # Popular routes chart (by frequency)
+    route_counts = Counter(flight_data.route.tolist()).most_common(10)
     
-    routes_chart.update_layout(
-        title='Most Popular Routes',
-        xaxis_title='Route',
-        yaxis_title='Number of Flights',
-        template='plotly_dark',
-        height=400,
-        xaxis_tickangle=-45
-    )
+    routes_chart = {
+        'data': [{
+            'type': 'bar',
+            'x': [route for route, _ in route_counts],
+            'y': [count for _, count in route_counts],
+            'marker': {'color': '#28a745'}
+        }],
+        'layout': {
+            **LAYOUT_BASE,
+            'title': {'text': 'Most Popular Routes'},
+            'xaxis': {'title': {'text': 'Route'}, 'tickangle': -45},
+            'yaxis': {'title': {'text': 'Number of Flights'}}
+        }
+    }
     
     # Demand by day of week
-    df['day_of_week'] = pd.to_datetime(df['date']).dt.day_name()
-    demand_by_day = df.groupby('day_of_week')['price'].mean().reindex([
-        'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
-    ])
-    
-    demand_chart = go.Figure(data=[
-        go.Bar(
-            x=demand_by_day.index,
-            y=demand_by_day.values,
-            marker_color='#ffc107'
-        )
-    ])
+    days, day_inverse = np.unique(flight_data.day_of_week, return_inverse=True)
+    day_idx = np.array([DAY_INDEX[day] for day in days.tolist()], dtype=np.int8)[day_inverse]
+    sums = np.bincount(day_idx, weights=prices, minlength=7)
+    counts = np.bincount(day_idx, minlength=7)
+    demand_by_day = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
     
-    demand_chart.update_layout(
-        title='Average Price by Day of Week',
-        xaxis_title='Day of Week',
-        yaxis_title='Average Price ($)',
-        template='plotly_dark',
-        height=400
-    )
+    demand_chart = {
+        'data': [{
+            'type': 'bar',
+            'x': DAYS_OF_WEEK,
+            'y': demand_by_day,
+            'marker': {'color': '#ffc107'}
+        }],
+        'layout': {
+            **LAYOUT_BASE,
+            'title': {'text': 'Average Price by Day of Week'},
+            'xaxis': {'title': {'text': 'Day of Week'}},
+            'yaxis': {'title': {'text': 'Average Price ($)'}}
+        }
+    }
     
     # Convert charts to JSON for template
     charts = {
-        'price_trend': json.dumps(price_chart, cls=plotly.utils.PlotlyJSONEncoder),
-        'popular_routes': json.dumps(routes_chart, cls=plotly.utils.PlotlyJSONEncoder),
-        'demand_by_day': json.dumps(demand_chart, cls=plotly.utils.PlotlyJSONEncoder)
+        'price_trend': figure_to_json(price_chart),
+        'popular_routes': figure_to_json(routes_chart),
+        'demand_by_day': figure_to_json(demand_chart)
     }
     
     return charts
 
+def figure_to_json(figure):
+    """Serialize a plain-dict Plotly figure to a JSON string"""
+    return orjson.dumps(
+        figure,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
 @app.route('/api/refresh-insights', methods=['POST'])
 def refresh_insights():
     """API endpoint to refresh insights"""
     try:
-        data = request.get_json()
-        flight_data = data.get('flight_data', [])
+        data = request.get_json(silent=True) or {}
+        data_key = data.get('data_key')
+        
+        if not data_key:
+            return jsonify({'error': 'No data key provided'}), 400
         
-        if not flight_data:
-            return jsonify({'error': 'No flight data provided'}), 400
+        flight_data = get_cached_flight_data(data_key)
+        if flight_data is None:
+            return jsonify({'error': 'Flight data has expired, please search again'}), 410
         
         insights = insights_generator.generate_insights(flight_data)
         return jsonify({'insights': insights})
     
     except Exception as e:
-        app.logger.error(f"Insights refresh error: {e}")
+        app.logger.error("Insights refresh error: %s", e)
         return jsonify({'error': 'Failed to refresh insights'}), 500
 
 if __name__ == '__main__':
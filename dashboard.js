@@ -148,7 +148,7 @@ async function refreshInsights() {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
-                flight_data: currentFlightData
+                data_key: document.getElementById('data-key').value
             })
         });
         
@@ -156,6 +156,10 @@ async function refreshInsights() {
             const data = await response.json();
             updateInsightsDisplay(data.insights);
             showToast('Insights refreshed successfully', 'success');
+        } else if (response.status === 410) {
+            // Server no longer has this dashboard's flight data; ask for a new search
+            const data = await response.json();
+            showToast(data.error, 'error');
         } else {
             throw new Error('Failed to refresh insights');
         }
@@ -1,6 +1,95 @@
-import random
-from datetime import datetime, timedelta
+from datetime import timedelta
+import hashlib
 import logging
+import re
+import numba
+import numpy as np
+
+
+def route_seed(from_city, to_city, start_date, end_date):
+    """Derive a stable RNG seed from a route and date range"""
+    key = f"{from_city}|{to_city}|{start_date.toordinal()}|{end_date.toordinal()}"
+    return int.from_bytes(hashlib.sha1(key.encode('utf-8')).digest()[:8], 'little')
+
+
+# Serial on purpose: this runs on concurrent request threads, and Numba's
+# default parallel threading layer is not safe to enter from several threads
+@numba.njit(cache=True)
+def _compute_prices(base_price, day_multiplier, day_idx, departure_hour, jitter,
+                    red_eye, early_morning, out):
+    """Apply all price multipliers in a single fused pass"""
+    for i in range(len(out)):
+        # Date-dependent premiums are precomputed once per day
+        multiplier = jitter[i] * day_multiplier[day_idx[i]]
+        
+        # Time of day adjustments
+        if departure_hour[i] < 6:  # Red-eye flights
+            multiplier *= red_eye
+        elif departure_hour[i] < 9:  # Early morning
+            multiplier *= early_morning
+        
+        out[i] = int(base_price[i] * multiplier)
+
+
+# Compile (or load from the on-disk cache) at import so the first request
+# doesn't pay for JIT compilation
+_compute_prices(
+    np.zeros(1, dtype=np.int64), np.ones(1), np.zeros(1, dtype=np.int64),
+    np.zeros(1, dtype=np.int64), np.ones(1), 1.0, 1.0, np.empty(1, dtype=np.int64)
+)
+
+
+# HH:MM label for every minute of the day
+_CLOCK_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)])
+
+
+def _format_clock(minutes):
+    """Format minutes past midnight as HH:MM strings"""
+    return _CLOCK_LABELS[minutes]
+
+
+class FlightData:
+    """Columnar flight records with one NumPy array per field"""
+    
+    FIELDS = (
+        'date', 'airline', 'flight_number', 'aircraft', 'departure_time',
+        'arrival_time', 'duration', 'price', 'route', 'from_city', 'to_city',
+        'day_of_week', 'route_type'
+    )
+    
+    def __init__(self, **columns):
+        for field in self.FIELDS:
+            values = np.asarray(columns[field])
+            # Instances may be shared through caches, so keep them immutable
+            values.flags.writeable = False
+            setattr(self, field, values)
+    
+    @classmethod
+    def empty(cls):
+        """Return a dataset with no flights"""
+        columns = {field: np.empty(0, dtype=str) for field in cls.FIELDS}
+        columns['price'] = np.empty(0, dtype=np.int64)
+        return cls(**columns)
+    
+    def __len__(self):
+        return len(self.price)
+    
+    def __iter__(self):
+        return self.rows()
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        return self._row(index)
+    
+    def _row(self, i):
+        return {field: getattr(self, field)[i].item() for field in self.FIELDS}
+    
+    def rows(self):
+        """Lazily yield each flight as a dict"""
+        for i in range(len(self)):
+            yield self._row(i)
+
 
 class FlightDataGenerator:
     """Generate realistic flight data for analysis"""
@@ -17,6 +106,14 @@ class FlightDataGenerator:
             'Boeing 777', 'Airbus A330', 'Boeing 787', 'Embraer E175'
         ]
         
+        # Cities used to classify routes. Names are matched anywhere in the
+        # free-text input (e.g. "Tokyo, Japan"), so each group is precompiled
+        # into a single pattern
+        self.major_cities = ('New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix')
+        self.international_cities = ('London', 'Paris', 'Tokyo', 'Sydney', 'Dubai')
+        self._international_pattern = re.compile('|'.join(map(re.escape, self.international_cities)))
+        self._major_pattern = re.compile('|'.join(map(re.escape, self.major_cities)))
+        
         # Base prices for different route types
         self.base_prices = {
             'short_haul': (150, 400),    # Under 3 hours
@@ -24,6 +121,13 @@ class FlightDataGenerator:
             'long_haul': (500, 1200)     # Over 6 hours
         }
         
+        # Flight duration ranges (hours) for different route types
+        self.duration_hours = {
+            'short_haul': (1, 3),
+            'medium_haul': (3, 6),
+            'long_haul': (6, 15)
+        }
+        
         # Price multipliers based on factors
         self.price_multipliers = {
             'weekend': 1.3,
@@ -33,113 +137,100 @@ class FlightDataGenerator:
             'early_morning': 0.9
         }
     
-    def generate_flight_data(self, from_city, to_city, start_date, end_date):
-        """Generate flight data for the specified route and date range"""
+    def generate_flight_data(self, from_city, to_city, start_date, end_date, seed=None):
+        """Generate flight data for the specified route and date range
+        
+        Passing the same seed reproduces the same flights.
+        """
         try:
-            flights = []
-            current_date = start_date
+            num_days = (end_date - start_date).days + 1
+            if num_days <= 0:
+                return FlightData.empty()
+            
+            rng = np.random.default_rng(seed)
             
             # Calculate route type based on cities (simplified logic)
             route_type = self._determine_route_type(from_city, to_city)
             
-            while current_date <= end_date:
-                # Generate 3-8 flights per day
-                daily_flights = random.randint(3, 8)
-                
-                for _ in range(daily_flights):
-                    flight = self._generate_single_flight(
-                        from_city, to_city, current_date, route_type
-                    )
-                    flights.append(flight)
-                
-                current_date += timedelta(days=1)
+            # Generate 3-8 flights per day, then expand per-day fields to per-flight
+            days = [start_date + timedelta(days=i) for i in range(num_days)]
+            daily_flights = rng.integers(3, 9, num_days)
+            day_idx = np.repeat(np.arange(num_days), daily_flights)
+            n = len(day_idx)
+            
+            # Date-dependent price premiums only vary per day, not per flight
+            weekday = np.array([day.weekday() for day in days])
+            month = np.array([day.month for day in days])
+            
+            # Weekend premium (Saturday or Sunday)
+            day_multiplier = np.where(weekday >= 5, self.price_multipliers['weekend'], 1.0)
+            
+            # Holiday premium (simplified - winter holidays and summer)
+            day_multiplier *= np.where(np.isin(month, [12, 1, 7]), self.price_multipliers['holiday'], 1.0)
+            
+            # Draw every random field in bulk
+            airline_idx = rng.integers(0, len(self.airlines), n)
+            aircraft_idx = rng.integers(0, len(self.aircraft_types), n)
+            flight_numbers = rng.integers(100, 10000, n)
+            departure_hour = rng.integers(5, 23, n)
+            departure_minute = rng.integers(0, 4, n) * 15  # 0, 15, 30 or 45
+            
+            # Flight duration based on route type
+            duration_lo, duration_hi = self.duration_hours[route_type]
+            duration_hours = rng.integers(duration_lo, duration_hi + 1, n)
+            duration_minutes = rng.integers(0, 60, n)
             
-            logging.info(f"Generated {len(flights)} flights for {from_city} to {to_city}")
+            # Arrival time in minutes past midnight
+            arrival = (departure_hour * 60 + departure_minute
+                       + duration_hours * 60 + duration_minutes) % 1440
+            
+            # Generate price with various factors
+            price_lo, price_hi = self.base_prices[route_type]
+            base_price = rng.integers(price_lo, price_hi + 1, n)
+            jitter = rng.uniform(0.8, 1.2, n)
+            prices = np.empty(n, dtype=np.int64)
+            _compute_prices(
+                base_price, day_multiplier, day_idx, departure_hour, jitter,
+                self.price_multipliers['red_eye'], self.price_multipliers['early_morning'],
+                prices
+            )
+            
+            # Expand per-day and lookup fields to per-flight columns
+            dates = np.array([day.strftime('%Y-%m-%d') for day in days])[day_idx]
+            day_names = np.array([day.strftime('%A') for day in days])[day_idx]
+            airlines = np.array(self.airlines)[airline_idx]
+            airline_codes = np.array([airline[:2].upper() for airline in self.airlines])[airline_idx]
+            
+            flights = FlightData(
+                date=dates,
+                airline=airlines,
+                flight_number=np.char.add(airline_codes, flight_numbers.astype(str)),
+                aircraft=np.array(self.aircraft_types)[aircraft_idx],
+                departure_time=_format_clock(departure_hour * 60 + departure_minute),
+                arrival_time=_format_clock(arrival),
+                duration=np.char.add(np.char.add(duration_hours.astype(str), 'h '),
+                                     np.char.add(duration_minutes.astype(str), 'm')),
+                price=prices,
+                route=np.full(n, f"{from_city} → {to_city}"),
+                from_city=np.full(n, from_city),
+                to_city=np.full(n, to_city),
+                day_of_week=day_names,
+                route_type=np.full(n, route_type)
+            )
+            
+            logging.info("Generated %d flights for %s to %s", len(flights), from_city, to_city)
             return flights
             
         except Exception as e:
-            logging.error(f"Error generating flight data: {e}")
-            return []
+            logging.error("Error generating flight data: %s", e)
+            return FlightData.empty()
     
     def _determine_route_type(self, from_city, to_city):
         """Determine if route is short, medium, or long haul"""
         # Simplified logic - in reality, you'd use distance/time data
-        major_cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix']
-        international_indicators = ['London', 'Paris', 'Tokyo', 'Sydney', 'Dubai']
-        
-        if any(city in from_city + to_city for city in international_indicators):
+        if self._international_pattern.search(from_city + to_city):
             return 'long_haul'
-        elif all(city in from_city + to_city for city in major_cities):
+        elif self._major_pattern.search(from_city) and self._major_pattern.search(to_city):
             return 'medium_haul'
         else:
             return 'short_haul'
-    
-    def _generate_single_flight(self, from_city, to_city, date, route_type):
-        """Generate a single flight record"""
-        # Basic flight info
-        airline = random.choice(self.airlines)
-        aircraft = random.choice(self.aircraft_types)
-        flight_number = f"{airline[:2].upper()}{random.randint(100, 9999)}"
-        
-        # Generate departure time
-        departure_hour = random.randint(5, 22)
-        departure_minute = random.choice([0, 15, 30, 45])
-        departure_time = f"{departure_hour:02d}:{departure_minute:02d}"
-        
-        # Generate flight duration based on route type
-        if route_type == 'short_haul':
-            duration_hours = random.randint(1, 3)
-        elif route_type == 'medium_haul':
-            duration_hours = random.randint(3, 6)
-        else:  # long_haul
-            duration_hours = random.randint(6, 15)
-        
-        duration_minutes = random.randint(0, 59)
-        duration = f"{duration_hours}h {duration_minutes}m"
-        
-        # Calculate arrival time
-        departure_dt = datetime.combine(date, datetime.strptime(departure_time, '%H:%M').time())
-        arrival_dt = departure_dt + timedelta(hours=duration_hours, minutes=duration_minutes)
-        arrival_time = arrival_dt.strftime('%H:%M')
-        
-        # Generate price with various factors
-        base_price_range = self.base_prices[route_type]
-        base_price = random.randint(base_price_range[0], base_price_range[1])
-        
-        # Apply price multipliers
-        price_multiplier = 1.0
-        
-        # Weekend premium
-        if date.weekday() >= 5:  # Saturday or Sunday
-            price_multiplier *= self.price_multipliers['weekend']
-        
-        # Holiday premium (simplified - around major holidays)
-        if date.month in [12, 1, 7]:  # Winter holidays and summer
-            price_multiplier *= self.price_multipliers['holiday']
-        
-        # Time of day adjustments
-        if departure_hour < 6:  # Red-eye flights
-            price_multiplier *= self.price_multipliers['red_eye']
-        elif departure_hour < 9:  # Early morning
-            price_multiplier *= self.price_multipliers['early_morning']
-        
-        # Add some randomness
-        price_multiplier *= random.uniform(0.8, 1.2)
-        
-        final_price = int(base_price * price_multiplier)
-        
-        return {
-            'date': date.strftime('%Y-%m-%d'),
-            'airline': airline,
-            'flight_number': flight_number,
-            'aircraft': aircraft,
-            'departure_time': departure_time,
-            'arrival_time': arrival_time,
-            'duration': duration,
-            'price': final_price,
-            'route': f"{from_city} → {to_city}",
-            'from_city': from_city,
-            'to_city': to_city,
-            'day_of_week': date.strftime('%A'),
-            'route_type': route_type
-        }
@@ -1,12 +1,43 @@
 import os
 import json
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import orjson
 from openai import OpenAI
 
+
+def _top_counts(values, k):
+    """Return the k most frequent values and their counts, most frequent first"""
+    uniques, counts = np.unique(values, return_counts=True)
+    top = np.argpartition(-counts, k)[:k] if len(uniques) > k else np.arange(len(uniques))
+    top = top[np.argsort(-counts[top], kind='stable')]
+    return {uniques[i].item(): int(counts[i]) for i in top}
+
+
+def _price_by_day(flight_data):
+    """Return flight counts and average price for each day of week present"""
+    days, day_idx = np.unique(flight_data.day_of_week, return_inverse=True)
+    counts = np.bincount(day_idx, minlength=len(days))
+    sums = np.bincount(day_idx, weights=flight_data.price, minlength=len(days))
+    flights_by_day = {day.item(): int(count) for day, count in zip(days, counts)}
+    avg_price_by_day = {day.item(): float(total / count) for day, total, count in zip(days, sums, counts)}
+    return flights_by_day, avg_price_by_day
+
+
 class FlightInsightsGenerator:
     """Generate AI-powered insights from flight data using OpenAI"""
     
+    # Maximum number of OpenAI responses kept in memory
+    CACHE_SIZE = 128
+    
     def __init__(self):
+        # OpenAI insights keyed by a hash of the data summary sent to the model
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         self.api_key = os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             logging.warning("OPENAI_API_KEY not found in environment variables")
@@ -17,12 +48,19 @@ class FlightInsightsGenerator:
     def generate_insights(self, flight_data):
         """Generate insights from flight data using OpenAI"""
         if not self.client:
-            return self._generate_fallback_insights(flight_data)
+            return self.generate_fallback_insights(flight_data)
         
         try:
             # Prepare data summary for OpenAI
             data_summary = self._prepare_data_summary(flight_data)
             
+            # Identical summaries would produce the same prompt, so reuse the answer
+            cache_key = hashlib.sha1(orjson.dumps(data_summary, option=orjson.OPT_SORT_KEYS)).digest()
+            with self._cache_lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    return self._cache[cache_key]
+            
             # Generate insights using OpenAI
             # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
             # do not change this unless explicitly requested by the user
@@ -35,7 +73,7 @@ class FlightInsightsGenerator:
                     },
                     {
                         "role": "user",
-                        "content": f"Analyze this flight data and provide insights: {json.dumps(data_summary, indent=2)}"
+                        "content": f"Analyze this flight data and provide insights: {orjson.dumps(data_summary).decode()}"
                     }
                 ],
                 response_format={"type": "json_object"}
@@ -43,60 +81,48 @@ class FlightInsightsGenerator:
             
             insights = json.loads(response.choices[0].message.content)
             logging.info("Successfully generated OpenAI insights")
+            
+            with self._cache_lock:
+                self._cache[cache_key] = insights
+                if len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            
             return insights
             
         except Exception as e:
-            logging.error(f"Error generating OpenAI insights: {e}")
-            return self._generate_fallback_insights(flight_data)
+            logging.error("Error generating OpenAI insights: %s", e)
+            return self.generate_fallback_insights(flight_data)
     
     def _prepare_data_summary(self, flight_data):
         """Prepare a summary of flight data for OpenAI analysis"""
         if not flight_data:
             return {}
         
-        # Calculate basic statistics
-        prices = [flight['price'] for flight in flight_data]
-        routes = [flight['route'] for flight in flight_data]
-        days = [flight['day_of_week'] for flight in flight_data]
-        airlines = [flight['airline'] for flight in flight_data]
-        
-        # Count occurrences
-        from collections import Counter
-        route_counts = Counter(routes)
-        day_counts = Counter(days)
-        airline_counts = Counter(airlines)
+        prices = flight_data.price
+        flights_by_day, avg_price_by_day = _price_by_day(flight_data)
+        dates = np.unique(flight_data.date)
         
-        # Calculate price statistics by day
-        price_by_day = {}
-        for flight in flight_data:
-            day = flight['day_of_week']
-            if day not in price_by_day:
-                price_by_day[day] = []
-            price_by_day[day].append(flight['price'])
-        
-        avg_price_by_day = {
-            day: sum(prices) / len(prices) 
-            for day, prices in price_by_day.items()
-        }
+        # Whole-dollar daily averages are enough for the model and keep the prompt short
+        avg_price_by_day = {day: round(avg) for day, avg in avg_price_by_day.items()}
         
         return {
             'total_flights': len(flight_data),
             'price_range': {
-                'min': min(prices),
-                'max': max(prices),
-                'avg': sum(prices) / len(prices)
+                'min': int(prices.min()),
+                'max': int(prices.max()),
+                'avg': round(float(prices.mean()), 2)
             },
-            'most_popular_routes': dict(route_counts.most_common(5)),
-            'flights_by_day': dict(day_counts),
+            'most_popular_routes': _top_counts(flight_data.route, 5),
+            'flights_by_day': flights_by_day,
             'avg_price_by_day': avg_price_by_day,
-            'top_airlines': dict(airline_counts.most_common(5)),
+            'top_airlines': _top_counts(flight_data.airline, 5),
             'date_range': {
-                'start': min(flight['date'] for flight in flight_data),
-                'end': max(flight['date'] for flight in flight_data)
+                'start': dates[0].item(),
+                'end': dates[-1].item()
             }
         }
     
-    def _generate_fallback_insights(self, flight_data):
+    def generate_fallback_insights(self, flight_data):
         """Generate basic insights when OpenAI is not available"""
         if not flight_data:
             return {
@@ -113,33 +139,21 @@ class FlightInsightsGenerator:
             }
         
         # Calculate basic statistics
-        prices = [flight['price'] for flight in flight_data]
-        routes = [flight['route'] for flight in flight_data]
+        prices = flight_data.price
         
-        # Group by day of week
-        from collections import defaultdict
-        prices_by_day = defaultdict(list)
-        for flight in flight_data:
-            prices_by_day[flight['day_of_week']].append(flight['price'])
-        
-        # Calculate averages
-        avg_prices_by_day = {
-            day: sum(prices) / len(prices) 
-            for day, prices in prices_by_day.items()
-        }
+        # Average price by day of week
+        _, avg_prices_by_day = _price_by_day(flight_data)
         
         # Find cheapest and most expensive days
         cheapest_day = min(avg_prices_by_day, key=avg_prices_by_day.get)
         most_expensive_day = max(avg_prices_by_day, key=avg_prices_by_day.get)
         
         # Most popular routes
-        from collections import Counter
-        route_counts = Counter(routes)
-        popular_routes = [route for route, count in route_counts.most_common(3)]
+        popular_routes = list(_top_counts(flight_data.route, 3))
         
         # Generate insights text
-        avg_price = sum(prices) / len(prices)
-        price_insights = f"Average flight price is ${avg_price:.2f}. Prices range from ${min(prices)} to ${max(prices)}. "
+        avg_price = float(prices.mean())
+        price_insights = f"Average flight price is ${avg_price:.2f}. Prices range from ${prices.min()} to ${prices.max()}. "
         price_insights += f"The cheapest flights are typically found on {cheapest_day}s (${avg_prices_by_day[cheapest_day]:.2f} avg), "
         price_insights += f"while {most_expensive_day}s tend to be most expensive (${avg_prices_by_day[most_expensive_day]:.2f} avg)."
         